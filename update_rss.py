@@ -2,14 +2,15 @@
 
 import os
 import sys
-import time
+import logging
 import argparse
+import re
 import feedparser
 import requests
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 from feedgen.feed import FeedGenerator
-from utils.llm import assess_relevance_and_tags, check_rate_limit_status, get_rate_limiter, update_daily_limit_for_paid_user, quick_assess_relevance
+from utils.llm import assess_relevance_and_tags, assess_many, check_rate_limit_status, get_rate_limiter, update_daily_limit_for_paid_user, quick_assess_many, quick_assess_relevance, prefetch_cached_results
 from utils.qdrant import init_qdrant_client, ensure_collection_exists, paper_exists, insert_paper
 
 load_dotenv()
@@ -24,6 +25,14 @@ DETAILED_ASSESSMENT_MODEL = os.getenv(
 QUICK_ASSESSMENT_MODEL = os.getenv(
     "QUICK_ASSESSMENT_MODEL", "openai/gpt-4.1-nano")
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0.1"))
+DETAILED_BATCH_SIZE = int(os.getenv("DETAILED_BATCH_SIZE", "1"))
+QUICK_BATCH_SIZE = int(os.getenv("QUICK_BATCH_SIZE", "1"))
+
+# arXiv RSS descriptions start with "arXiv:2501.01234v1 Announce Type: new \nAbstract: "
+_ARXIV_ABSTRACT_PREFIX_RE = re.compile(r'^\s*arXiv:\S+\s+Announce Type:\s*\S+\s*(?:Abstract:\s*)?')
+_WHITESPACE_RE = re.compile(r'\s+')
+_ARXIV_VERSION_RE = re.compile(r'v\d+$')
+_NON_WORD_RE = re.compile(r'\W+')
 
 # Constants
 FEEDS = [
@@ -54,6 +63,57 @@ FEED_CONFIGS = {
     }
 }
 
+# Pricing per 1K tokens (input/output combined for simplicity)
+# Based on OpenRouter pricing as of 2024
+MODEL_PRICING = {
+    # OpenAI models
+    "openai/gpt-4o": 0.005,  # $5.00 per 1M tokens
+    "openai/gpt-4o-mini": 0.00015,  # $0.15 per 1M tokens
+    "openai/gpt-4-turbo": 0.01,  # $10.00 per 1M tokens
+    "openai/gpt-3.5-turbo": 0.0005,  # $0.50 per 1M tokens
+    "openai/gpt-4.1": 0.01,  # $10.00 per 1M tokens
+    "openai/gpt-4.1-mini": 0.00015,  # $0.15 per 1M tokens
+    "openai/gpt-4.1-nano": 0.000075,  # $0.075 per 1M tokens
+    "openai/gpt-5": 0.01,  # $10.00 per 1M tokens
+    "openai/gpt-5-mini": 0.00015,  # $0.15 per 1M tokens
+    "openai/gpt-5-nano": 0.000075,  # $0.075 per 1M tokens
+
+    # Anthropic models
+    "anthropic/claude-3-5-sonnet": 0.003,  # $3.00 per 1M tokens
+    "anthropic/claude-3-haiku": 0.00025,  # $0.25 per 1M tokens
+    "anthropic/claude-3-sonnet": 0.015,  # $15.00 per 1M tokens
+    "anthropic/claude-3-opus": 0.075,  # $75.00 per 1M tokens
+
+    # Google models
+    "google/gemini-pro": 0.0005,  # $0.50 per 1M tokens
+    "google/gemini-flash": 0.000075,  # $0.075 per 1M tokens
+
+    # Meta models
+    "meta-llama/llama-3.1-8b-instruct": 0.0002,  # $0.20 per 1M tokens
+    "meta-llama/llama-3.1-70b-instruct": 0.0008,  # $0.80 per 1M tokens
+
+    # Moonshot models
+    "moonshotai/kimi-dev-72b:free": 0.0,  # Free tier
+    "moonshotai/kimi-dev-72b": 0.0006,  # $0.60 per 1M tokens
+
+    # Mistral models
+    "mistralai/mistral-7b-instruct": 0.00014,  # $0.14 per 1M tokens
+    "mistralai/mixtral-8x7b-instruct": 0.00024,  # $0.24 per 1M tokens
+
+    # Default fallback
+    "default": 0.001  # $1.00 per 1M tokens
+}
+
+
+def clean_abstract(abstract: str) -> str:
+    """Strip the arXiv announcement header and collapse whitespace in an abstract.
+
+    The header carries no signal for the model and would otherwise be sent
+    (and billed) with every assessment prompt.
+    """
+    abstract = _ARXIV_ABSTRACT_PREFIX_RE.sub('', abstract)
+    return _WHITESPACE_RE.sub(' ', abstract).strip()
+
 
 def parse_arguments():
     """Parse command-line arguments."""
@@ -220,7 +280,8 @@ def process_paper(paper: dict, feed_type: str = "ai-security") -> dict:
 def process_papers(raw_papers, feed_type: str, collection_name: str, qdrant_client):
     global total_tokens
     relevant = []
-    current_date = datetime.now(timezone.utc).date()
+    # Every paper in this batch is stamped with the same processing date
+    date = datetime.now(timezone.utc).date().isoformat()
 
     # Track token usage for different models
     quick_assessment_tokens = 0
@@ -229,19 +290,16 @@ def process_papers(raw_papers, feed_type: str, collection_name: str, qdrant_clie
     # Define models for different stages - using environment variables
     # These variables are defined in .env and loaded at the top of the file
 
-    # Define delay between detailed assessments to avoid rate limiting
-    # Only apply delay for models subject to free tier limit (like kimi)
-    # With 20 requests per minute allowed, we can safely use a 1.5 second delay (60/20 = 3, but we can be a bit more aggressive)
-    DETAILED_ASSESSMENT_DELAY = 1.5  # seconds between requests
-
-    # Check if the detailed assessment model is subject to rate limiting
-    is_free_tier_model = DETAILED_ASSESSMENT_MODEL.endswith(':free')
+    # Papers parsed from the feed, and those that pass the quick assessment
+    parsed = []
+    candidates = []
+    # arXiv ids and normalized titles already queued, to skip cross-listings
+    seen = set()
 
     for paper in raw_papers:
         title = paper.title if hasattr(paper, 'title') else ""
         url = paper.link if hasattr(paper, 'link') else ""
         abstract = paper.summary if hasattr(paper, 'summary') else ""
-        date = datetime.now(timezone.utc).date().isoformat()
 
         # Determine source and parse metadata accordingly
         if "aclanthology.org" in url:
@@ -264,12 +322,23 @@ def process_papers(raw_papers, feed_type: str, collection_name: str, qdrant_clie
                 ",")] if hasattr(paper, 'author') else ["Unknown"]
             paper_id = url.split("/")[-1] if "arxiv.org" in url else ""
             publication_type = "preprint"
+            abstract = clean_abstract(abstract)
             # For ArXiv, use title + abstract
             assessment_text = f"Title: {title}\n\nAbstract: {abstract}"
 
         if not title or not url:
             continue
 
+        # The same paper is announced in every category it is cross-listed in,
+        # and revised versions reappear; assess each paper only once
+        keys = {"title:" + _NON_WORD_RE.sub(' ', title.lower()).strip()}
+        if paper_id:
+            keys.add("id:" + _ARXIV_VERSION_RE.sub('', paper_id))
+        if not seen.isdisjoint(keys):
+            print(f"⏭️ Skipping duplicate: {title}")
+            continue
+        seen.update(keys)
+
         print(f"\n📅 Processing paper published on: {date}")
         print(f"📄 Title: {title}")
 
@@ -278,12 +347,37 @@ def process_papers(raw_papers, feed_type: str, collection_name: str, qdrant_clie
         #     print(f"⏭️ Already exists: {title}")
         #     continue
 
-        fulltext = f"Title: {title}\nAbstract: {abstract}\nURL: {url}"
-
-        # STAGE 1: Quick assessment with cheaper model
-        print(f"🔍 Quick relevance assessment...")
-        potentially_relevant, quick_tokens = quick_assess_relevance(
-            fulltext, OPENROUTER_API_KEY, temperature=TEMPERATURE, model=QUICK_ASSESSMENT_MODEL, feed_type=feed_type)
+        # Create a paper dict that matches what process_paper expects
+        parsed.append({
+            "title": title,
+            "abstract": abstract,
+            "url": url,
+            "authors": authors,
+            "date": date,
+            "source": source,
+            "arxiv_id": paper_id,
+            "cited_by_count": 0,
+            "publication_type": publication_type,
+            "code_repository": "",
+            "_assessment_text": assessment_text,
+            # The URL carries no signal for the model, so keep it out of the prompt
+            "_quick_text": f"Title: {title}\nAbstract: {abstract}"
+        })
+
+    # STAGE 1: Quick assessment with cheaper model
+    # Requests run concurrently; the shared rate limiters keep them within the API limits
+    print(f"\n🔍 Quick relevance assessment of {len(parsed)} papers...")
+    quick_texts = [paper_dict.pop("_quick_text") for paper_dict in parsed]
+    # Load answers from earlier runs in one query rather than one per paper
+    prefetch_cached_results(quick_assess_relevance, quick_texts, QUICK_ASSESSMENT_MODEL,
+                            temperature=TEMPERATURE, feed_type=feed_type)
+    quick_results = quick_assess_many(
+        quick_texts,
+        OPENROUTER_API_KEY, temperature=TEMPERATURE, model=QUICK_ASSESSMENT_MODEL, feed_type=feed_type,
+        batch_size=QUICK_BATCH_SIZE)
+
+    for paper_dict, (potentially_relevant, quick_tokens) in zip(parsed, quick_results):
+        title = paper_dict["title"]
         quick_assessment_tokens += quick_tokens
 
         if not potentially_relevant:
@@ -291,20 +385,21 @@ def process_papers(raw_papers, feed_type: str, collection_name: str, qdrant_clie
             continue
 
         print(f"✓ Potentially relevant (quick assessment): {title}")
-
-        # STAGE 2: Detailed assessment with more expensive model
-        print(f"🔍 Detailed relevance assessment...")
-
-        # Add delay between detailed assessments if using a free tier model
-        # This helps avoid hitting the rate limit (20 requests/60 seconds)
-        if is_free_tier_model and len(relevant) > 0:
-            delay_time = DETAILED_ASSESSMENT_DELAY
-            print(
-                f"⏱️ Adding delay of {delay_time}s before detailed assessment to avoid rate limiting...")
-            time.sleep(delay_time)
-
-        result, detailed_tokens = assess_relevance_and_tags(
-            assessment_text, OPENROUTER_API_KEY, temperature=TEMPERATURE, model=DETAILED_ASSESSMENT_MODEL, feed_type=feed_type)
+        candidates.append(paper_dict)
+
+    # STAGE 2: Detailed assessment with more expensive model
+    # Requests run concurrently; the shared rate limiters keep them within the API limits
+    print(f"\n🔍 Detailed relevance assessment of {len(candidates)} papers...")
+    assessment_texts = [paper_dict.pop("_assessment_text") for paper_dict in candidates]
+    prefetch_cached_results(assess_relevance_and_tags, assessment_texts, DETAILED_ASSESSMENT_MODEL,
+                            temperature=TEMPERATURE, feed_type=feed_type)
+    assessments = assess_many(
+        assessment_texts,
+        OPENROUTER_API_KEY, temperature=TEMPERATURE, model=DETAILED_ASSESSMENT_MODEL, feed_type=feed_type,
+        batch_size=DETAILED_BATCH_SIZE)
+
+    for paper_dict, (result, detailed_tokens) in zip(candidates, assessments):
+        title = paper_dict["title"]
         detailed_assessment_tokens += detailed_tokens
 
         if not result["relevant"]:
@@ -313,20 +408,8 @@ def process_papers(raw_papers, feed_type: str, collection_name: str, qdrant_clie
 
         print(f"✅ Relevant: {title}")
 
-        # Create a paper dict that matches what process_paper expects
-        paper_dict = {
-            "title": title,
-            "abstract": abstract,
-            "url": url,
-            "authors": authors,
-            "date": date,
-            "source": source,
-            "arxiv_id": paper_id,
-            "cited_by_count": 0,
-            "publication_type": publication_type,
-            "code_repository": ""
-        }
-
+        # Reuse the detailed assessment instead of letting process_paper repeat it
+        paper_dict["_assessment_result"] = result
         row = process_paper(paper_dict, feed_type=feed_type)
 
         # Ensure code repository is empty string if not present
@@ -336,7 +419,6 @@ def process_papers(raw_papers, feed_type: str, collection_name: str, qdrant_clie
         # Skip Qdrant insertion to avoid vector configuration errors
         # insert_paper(qdrant_client, row, collection_name)
         relevant.append(row)
-        # Rate limiting is now handled automatically by the new system
 
     # Add both token counts to the total
     total_tokens = quick_assessment_tokens + detailed_assessment_tokens
@@ -383,55 +465,17 @@ def estimate_cost(tokens, model=None):
     if model is None:
         model = DETAILED_ASSESSMENT_MODEL
 
-    # Pricing per 1K tokens (input/output combined for simplicity)
-    # Based on OpenRouter pricing as of 2024
-    pricing = {
-        # OpenAI models
-        "openai/gpt-4o": 0.005,  # $5.00 per 1M tokens
-        "openai/gpt-4o-mini": 0.00015,  # $0.15 per 1M tokens
-        "openai/gpt-4-turbo": 0.01,  # $10.00 per 1M tokens
-        "openai/gpt-3.5-turbo": 0.0005,  # $0.50 per 1M tokens
-        "openai/gpt-4.1": 0.01,  # $10.00 per 1M tokens
-        "openai/gpt-4.1-mini": 0.00015,  # $0.15 per 1M tokens
-        "openai/gpt-4.1-nano": 0.000075,  # $0.075 per 1M tokens
-        "openai/gpt-5": 0.01,  # $10.00 per 1M tokens
-        "openai/gpt-5-mini": 0.00015,  # $0.15 per 1M tokens
-        "openai/gpt-5-nano": 0.000075,  # $0.075 per 1M tokens
-
-        # Anthropic models
-        "anthropic/claude-3-5-sonnet": 0.003,  # $3.00 per 1M tokens
-        "anthropic/claude-3-haiku": 0.00025,  # $0.25 per 1M tokens
-        "anthropic/claude-3-sonnet": 0.015,  # $15.00 per 1M tokens
-        "anthropic/claude-3-opus": 0.075,  # $75.00 per 1M tokens
-
-        # Google models
-        "google/gemini-pro": 0.0005,  # $0.50 per 1M tokens
-        "google/gemini-flash": 0.000075,  # $0.075 per 1M tokens
-
-        # Meta models
-        "meta-llama/llama-3.1-8b-instruct": 0.0002,  # $0.20 per 1M tokens
-        "meta-llama/llama-3.1-70b-instruct": 0.0008,  # $0.80 per 1M tokens
-
-        # Moonshot models
-        "moonshotai/kimi-dev-72b:free": 0.0,  # Free tier
-        "moonshotai/kimi-dev-72b": 0.0006,  # $0.60 per 1M tokens
-
-        # Mistral models
-        "mistralai/mistral-7b-instruct": 0.00014,  # $0.14 per 1M tokens
-        "mistralai/mixtral-8x7b-instruct": 0.00024,  # $0.24 per 1M tokens
-
-        # Default fallback
-        "default": 0.001  # $1.00 per 1M tokens
-    }
-
     # Get cost per token (convert from per 1M to per token)
-    cost_per_1k_tokens = pricing.get(model, pricing["default"])
+    cost_per_1k_tokens = MODEL_PRICING.get(model, MODEL_PRICING["default"])
     cost_per_token = cost_per_1k_tokens / 1000
 
     return round(tokens * cost_per_token, 4)
 
 
 def main():
+    # Send library log messages to stdout alongside this script's own output
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     # Parse command-line arguments
     args = parse_arguments()
     feed_type = args.feed_type
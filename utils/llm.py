@@ -1,20 +1,38 @@
 # utils/llm.py
 
 import os
+import ast
+import hashlib
+import inspect
 import json
+import logging
+import random
 import requests
 import time
 import threading
-from collections import deque
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from functools import lru_cache, wraps
+from types import MappingProxyType
 from dotenv import load_dotenv
-from typing import Tuple, Dict, Any, List
-from datetime import datetime, timezone, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Tuple, Dict, Any, List, Optional
 import re
 from sentence_transformers import SentenceTransformer
+from utils.llm_cache import LLMCache, get_persistent_cache, prefetch_cache, SEMANTIC_CACHE_ENABLED
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speed-up; fall back to the stdlib parser
+    orjson = None
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Default configuration
 DEFAULT_MODEL = "openai/gpt-4.1"
 DEFAULT_MINI_MODEL = "openai/gpt-4.1-mini"
@@ -22,6 +40,7 @@ DEFAULT_TEMPERATURE = 0.1
 
 # OpenRouter configuration
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+CHAT_COMPLETIONS_URL = f"{OPENROUTER_BASE_URL}/chat/completions"
 
 # Rate limiting configuration for free tier
 FREE_TIER_REQUESTS_PER_WINDOW = 20
@@ -29,6 +48,18 @@ FREE_TIER_WINDOW_SECONDS = 60
 FREE_TIER_DAILY_LIMIT = 50  # Default daily limit for free tier
 FREE_TIER_DAILY_LIMIT_PAID = 1000  # Daily limit if you've purchased 10+ credits
 SAFETY_MARGIN = 0.1  # 10% safety margin
+RATE_LIMIT_BURST = 2  # Requests admitted back to back; the rest of each window's quota is spread evenly
+MAX_WORKERS = 8  # Concurrent OpenRouter requests; the rate limiters still cap throughput
+SECONDS_PER_DAY = 86400  # Unix time has no leap seconds, so UTC days are exactly this long
+MAX_RETRY_DELAY = 8.0  # Upper bound in seconds on a single backoff sleep
+MAX_RATE_LIMIT_WAIT = 3600  # Longer waits (e.g. a daily quota resetting at midnight UTC) end the run instead
+NON_RETRYABLE_STATUS_CODES = frozenset({400, 401, 403, 404})  # Retrying cannot fix these
+MAX_CACHE_ENTRIES = 2048  # In-memory LLM response cache size; older entries are evicted
+RATE_LIMIT_EXEMPT_MODELS = frozenset({
+    "openai/gpt-4.1-nano",
+    # Add other models that don't count toward the rate limit
+})
+BATCH_CHAR_BUDGET = 24000  # Max characters of paper text per batched request, to stay well inside small context windows
 
 # OpenRouter pricing (per 1M tokens) - Updated as of Dec 2024
 # These are approximate rates and may change
@@ -46,183 +77,556 @@ OPENROUTER_PRICING = {
     "google/gemini-pro": {"input": 0.50, "output": 1.50},
 }
 
+# (input, output) USD per token, derived once from OPENROUTER_PRICING for calculate_cost
+_COST_PER_TOKEN = {model: (p["input"] / 1_000_000, p["output"] / 1_000_000)
+                   for model, p in OPENROUTER_PRICING.items()}
+_DEFAULT_COST_PER_TOKEN = _COST_PER_TOKEN["openai/gpt-4o"]
+
+# Thinking/reasoning blocks some models emit before the JSON answer
+_THINK_RE = re.compile(
+    r'◁think▷.*?◁/think▷|<think>.*?</think>|<reasoning>.*?</reasoning>|<analysis>.*?</analysis>'
+    r'|<thought>.*?</thought>|<step>.*?</step>|<process>.*?</process>', re.DOTALL)
+
+
+def _loads(data):
+    """Parse JSON from str or bytes, using orjson when it is installed.
+
+    Both parsers raise a json.JSONDecodeError subclass on malformed input.
+    orjson rejects the NaN/Infinity literals some models emit for scores, so
+    input containing them is retried with the stdlib parser, which accepts them.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            text = data.decode("utf-8", "replace") if isinstance(data, (bytes, bytearray)) else data
+            if "NaN" not in text and "Infinity" not in text:
+                raise
+    return json.loads(data)
+
+
+def _dumps(obj) -> bytes:
+    """Serialize obj to compact UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Keyword screen for the ai-security feed, run before the quick LLM assessment.
+# Each group is one attack/defense concept, so spelling variants (backdoor,
+# backdoors, backdoored) count once; generic LLM vocabulary is not evidence.
+_RELEVANT_KEYWORDS = re.compile(
+    r'\b(?:(?P<jailbreak>jailbr[eo]ak\w*)|(?P<prompt_injection>prompt[- ]injections?)'
+    r'|(?P<adversarial>adversarial(?:ly)?)|(?P<red_team>red[- ]team\w*)'
+    r'|(?P<poisoning>(?:data )?poison\w*)|(?P<model_extraction>model (?:extraction|stealing))'
+    r'|(?P<backdoor>backdoor\w*)|(?P<membership_inference>membership inference))\b', re.IGNORECASE)
+_IRRELEVANT_KEYWORDS = re.compile(
+    r'\b(diabetes|protein folding|radiology|crop yield|clinical trials?|randomized controlled'
+    r'|histopathology|galax(?:y|ies)|quantum field)\b', re.IGNORECASE)
+# Broad security vocabulary; any of it keeps an off-topic-looking paper away from a keyword rejection
+_SECURITY_TERMS = re.compile(
+    r'\b(attack\w*|adversar\w*|secur\w*|privacy|private|vulnerab\w*|threat\w*|exploit\w*|malicious'
+    r'|evasion|evade|robust\w*|guardrails?|safety|defen[cs]\w*|inversion|inference attacks?|poison\w*'
+    r'|backdoor\w*|jailbr[eo]ak\w*|injection|tamper\w*|steal\w*|leak\w*|watermark\w*|trojan\w*)\b',
+    re.IGNORECASE)
+
+# Unescaped single quotes, for repairing single-quoted output ({'relevant': true})
+_SINGLE_QUOTE_RE = re.compile(r"(?<!\\)'")
+# Commas before a closing bracket, for repairing output like {"tags": ["a", "b",],}
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+
+
+# System prompts, built once at import. Each feed type maps to a ready-made
+# system message so a request only has to add the user message.
+
+# Output contract shared by both relevance prompts; keys match what update_rss.process_paper reads
+_RELEVANCE_OUTPUT_FORMAT = """
+Output ONLY a JSON object, no markdown or other text.
+Relevant (score ≥3): {"relevant": true, "summary": [2-4 bullet strings], "tags": [3-5 strings], "relevance_score": 1-5, "reason": "<brief>", "paper_type": "Research|Survey|Benchmarking|Position|Other", "modalities": ["Text|Image|Video|Audio|Multimodal|Other"]}
+Otherwise: {"relevant": false}"""
+
+_RELEVANCE_PROMPT_WEB3 = """Assess if this paper directly addresses vulnerabilities in smart contracts, blockchains, or Web3 systems.
+
+ONLY RELEVANT if the paper:
+- Identifies, analyzes, or prevents vulnerabilities in smart contracts (e.g., reentrancy, integer overflow, access control flaws)
+- Studies security flaws in DeFi protocols (e.g., flash loan exploits, MEV attacks, oracle manipulation)
+- Analyzes blockchain consensus vulnerabilities or attacks (e.g., 51% attacks, selfish mining, double-spending)
+- Develops tools for smart contract security (e.g., auditing tools, formal verification, vulnerability detection)
+- Examines bridge vulnerabilities, Layer 2 security flaws, or cross-chain attack vectors
+- Studies cryptocurrency wallet/exchange security vulnerabilities or blockchain attack techniques
+
+NOT RELEVANT:
+- Papers using blockchain as a data management layer or infrastructure for other purposes (e.g., "blockchain for IoT security", "blockchain-based access control")
+- General privacy technologies that happen to use blockchain (e.g., decentralized identity without vulnerability focus)
+- Cryptocurrency trading, economics, or market analysis without security vulnerability aspects
+- Blockchain applications without vulnerability or security flaw analysis
+- Papers about blockchain benefits, performance, or general system design without security vulnerability focus
+""" + _RELEVANCE_OUTPUT_FORMAT
+
+_RELEVANCE_PROMPT_AI = """Assess if this paper is about AI SECURITY VULNERABILITIES, ATTACKS, or DEFENSES.
+
+ONLY RELEVANT if the paper:
+- Studies attack methods: jailbreaking, prompt injection, adversarial examples, model extraction, data poisoning, 
+- Develops defense mechanisms: guardrails, safety mechanisms, attack detection/prevention, robustness techniques, input validation
+- Performs red teaming: systematically testing models for vulnerabilities, adversarial safety evaluation
+- Analyzes privacy vulnerabilities: membership inference, model inversion, training data extraction, unintended memorization
+- Develops security tools: vulnerability scanners, automated red teaming systems, security benchmarks WITH attack scenarios
+
+NOT RELEVANT:
+- General AI capabilities, performance benchmarks, or domain applications (medical, IoT, legal, etc.) without security/attack analysis
+- General alignment, helpfulness, or capability improvements without vulnerability/attack focus
+- AI ethics, fairness, bias, or responsibility without specific security vulnerability analysis
+- General reasoning, chain-of-thought, or prompting techniques without adversarial/security context
+- Federated/distributed learning, model compression, efficiency, unlearning
+- Any paper where security/attacks are not the PRIMARY focus
+""" + _RELEVANCE_OUTPUT_FORMAT
+
+_QUICK_PROMPT_WEB3 = """Determine if this paper is about vulnerabilities in smart contracts, blockchains, or Web3 systems.
+
+ONLY "yes" if about: smart contract vulnerabilities, DeFi security flaws, blockchain consensus attacks,
+security auditing tools, formal verification, exploit analysis, vulnerability detection,
+wallet/exchange security vulnerabilities, bridge attacks, Layer 2 security flaws.
+
+"no" if: using blockchain as infrastructure for other purposes, general privacy tech,
+trading/economics, blockchain applications without vulnerability focus.
+
+Respond with ONLY "yes" or "no"."""
+
+_QUICK_PROMPT_AI = """Determine if this paper is about AI SECURITY VULNERABILITIES, ATTACKS, or DEFENSES.
+
+ONLY "yes" if the paper studies:
+- Attacks: jailbreaking, prompt injection, adversarial examples, model extraction, data poisoning,
+- Defenses: guardrails, safety mechanisms, attack detection, robustness techniques
+- Red teaming: testing models for vulnerabilities, safety evaluation with adversarial intent
+- Privacy attacks: membership inference, model inversion, data extraction from models
+
+"no" if:
+- General AI capabilities, benchmarks, or applications (medical, IoT, legal, etc.) WITHOUT security/attack focus
+- General AI ethics, fairness, or bias WITHOUT security vulnerability aspects
+- Federated/distributed learning, unlearning
+- AI alignment or safety WITHOUT discussing specific vulnerabilities or attacks
+
+Respond with ONLY "yes" or "no"."""
+
+_RELEVANCE_SYSTEM_MESSAGES = {
+    "web3-security": {"role": "system", "content": _RELEVANCE_PROMPT_WEB3},
+    "ai-security": {"role": "system", "content": _RELEVANCE_PROMPT_AI},
+}
+
+# Appended to the relevance prompt when several papers share one request
+_BATCH_INSTRUCTIONS = """
+
+You will receive a JSON array of papers, each with an "id" and a "text". Assess each paper independently using the rules above and respond with a JSON object of the form {"results": [{"id": <id>, ...assessment...}]} containing exactly one entry per paper."""
+
+_RELEVANCE_BATCH_SYSTEM_MESSAGES = {
+    feed: {"role": "system", "content": message["content"] + _BATCH_INSTRUCTIONS}
+    for feed, message in _RELEVANCE_SYSTEM_MESSAGES.items()
+}
+_QUICK_SYSTEM_MESSAGES = {
+    "web3-security": {"role": "system", "content": _QUICK_PROMPT_WEB3},
+    "ai-security": {"role": "system", "content": _QUICK_PROMPT_AI},
+}
+
+# Appended to the quick prompt when several papers share one request
+_QUICK_BATCH_INSTRUCTIONS = """
+
+You will receive a JSON array of papers, each with an "id" and a "text". Instead of a single word, respond with a JSON object of the form {"results": [{"id": <id>, "answer": "yes" or "no"}]} containing exactly one entry per paper."""
+
+_QUICK_BATCH_SYSTEM_MESSAGES = {
+    feed: {"role": "system", "content": message["content"] + _QUICK_BATCH_INSTRUCTIONS}
+    for feed, message in _QUICK_SYSTEM_MESSAGES.items()
+}
+
+# Part of every cache key: a digest of all system prompts, so editing any prompt
+# automatically stops cached answers produced with the old wording from being reused
+PROMPT_VERSION = hashlib.sha256("\0".join(
+    message["content"]
+    for messages in (_RELEVANCE_SYSTEM_MESSAGES, _RELEVANCE_BATCH_SYSTEM_MESSAGES,
+                     _QUICK_SYSTEM_MESSAGES, _QUICK_BATCH_SYSTEM_MESSAGES)
+    for _, message in sorted(messages.items())
+).encode("utf-8")).hexdigest()[:16]
+
+
+# Snapshots returned by the limiters' get_status()
+MinuteStatus = namedtuple("MinuteStatus", "requests_in_window max_requests window_seconds time_until_reset")
+DailyStatus = namedtuple("DailyStatus", "requests_today daily_limit remaining_today")
+
+
+class JSONExtractionError(ValueError):
+    """Raised when no JSON object can be recovered from a model response."""
+
+
+class _FallbackResult(tuple):
+    """A default (result, tokens) pair returned when an assessment failed.
+
+    It unpacks like any other result, but cached_llm_call never stores it, so
+    a transient error or a malformed reply is retried on the next call instead
+    of being served from the cache as a genuine negative.
+    """
+
 
 class DailyRateLimiter:
-    """Rate limiter for daily API call limits."""
+    """Rate limiter for daily API call limits.
+
+    The daily quota resets at midnight UTC, so the only state needed is the
+    current UTC day (as days since the Unix epoch) and the number of requests
+    made on it. Unlike RateLimiter this must use the wall clock (time.time()),
+    because the reset is tied to calendar days rather than elapsed time.
+    """
 
     def __init__(self, daily_limit=FREE_TIER_DAILY_LIMIT):
         self.daily_limit = daily_limit
-        self.request_dates = deque()
+        self.current_day = 0
+        self.today_count = 0
         self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+
+    def _roll_day(self, today):
+        """Reset the counter when the UTC day changes."""
+        if today != self.current_day:
+            self.current_day = today
+            self.today_count = 0
 
     def check_and_record(self):
         """Check daily limit and record the request."""
-        with self.lock:
-            now = datetime.now()
-            today = now.date()
-
-            # Remove requests from previous days
-            while self.request_dates and self.request_dates[0].date() < today:
-                self.request_dates.popleft()
+        with self.cond:
+            now = time.time()
+            self._roll_day(int(now // SECONDS_PER_DAY))
 
             # Check if we're at the daily limit
-            if len(self.request_dates) >= self.daily_limit:
+            while self.today_count >= self.daily_limit:
                 # Calculate time until midnight UTC (when the daily limit resets)
-                midnight_utc = datetime.combine(today + timedelta(days=1), datetime.min.time()).replace(tzinfo=timezone.utc)
-                now_utc = now.replace(tzinfo=timezone.utc)
-                wait_time = (midnight_utc - now_utc).total_seconds()
-                
-                print(f"⏱️ Daily rate limit reached. Waiting until midnight UTC ({wait_time:.1f} seconds)...")
-                print(f"💡 You've reached the daily limit ({self.daily_limit} requests/day).")
-                
+                wait_time = SECONDS_PER_DAY - now % SECONDS_PER_DAY
+
+                logger.info("⏱️ Daily rate limit reached. Waiting until midnight UTC (%.1f seconds)...", wait_time)
+                logger.info("💡 You've reached the daily limit (%d requests/day).", self.daily_limit)
+
                 # If wait time is too long (more than 1 hour), exit instead of waiting
-                if wait_time > 3600:
-                    print(f"❌ Wait time too long ({wait_time:.1f} seconds). Terminating process.")
+                if wait_time > MAX_RATE_LIMIT_WAIT:
+                    logger.error("❌ Wait time too long (%.1f seconds). Terminating process.", wait_time)
                     exit(1)
-                
-                # Release the lock while waiting
-                self.lock.release()
-                time.sleep(wait_time)
-                # Reacquire the lock
-                self.lock.acquire()
-                
-                # After waiting, recalculate and clean up old requests
-                now = datetime.now()
-                today = now.date()
-                while self.request_dates and self.request_dates[0].date() < today:
-                    self.request_dates.popleft()
-
-            # Add current request
-            self.request_dates.append(now)
 
-    def get_status(self):
-        """Get current daily rate limit status."""
-        with self.lock:
-            now = datetime.now()
-            today = now.date()
+                # Waiting releases the lock and reacquires it even if interrupted
+                self.cond.wait(timeout=wait_time)
+
+                # After waiting, move to the new day's counter
+                now = time.time()
+                self._roll_day(int(now // SECONDS_PER_DAY))
 
-            # Remove old requests
-            while self.request_dates and self.request_dates[0].date() < today:
-                self.request_dates.popleft()
+            # Count current request
+            self.today_count += 1
 
-            return {
-                "requests_today": len(self.request_dates),
-                "daily_limit": self.daily_limit,
-                "remaining_today": max(0, self.daily_limit - len(self.request_dates))
-            }
+    def get_status(self):
+        """Get current daily rate limit status.
+
+        Reads the counters without taking the lock; the result is advisory and
+        admission decisions stay serialized in check_and_record.
+        """
+        today = int(time.time() // SECONDS_PER_DAY)
+        requests_today = self.today_count if self.current_day == today else 0
+
+        return DailyStatus(
+            requests_today=requests_today,
+            daily_limit=self.daily_limit,
+            remaining_today=max(0, self.daily_limit - requests_today)
+        )
 
 
 class RateLimiter:
-    """Rate limiter for OpenRouter API calls to respect free tier limits."""
+    """Rate limiter for OpenRouter API calls to respect free tier limits.
+
+    Token bucket: the bucket holds up to ``burst`` tokens and refills at
+    ``(requests_per_window - burst) / window_seconds`` tokens per second; each
+    request consumes one token. A bucket admits at most its capacity plus what
+    it refills in any interval, so no window of ``window_seconds`` ever sees
+    more than ``requests_per_window`` requests. Timestamps come from
+    time.monotonic() so wall-clock adjustments cannot distort the refill.
+    """
 
     def __init__(self, requests_per_window=FREE_TIER_REQUESTS_PER_WINDOW,
-                 window_seconds=FREE_TIER_WINDOW_SECONDS):
+                 window_seconds=FREE_TIER_WINDOW_SECONDS, burst=RATE_LIMIT_BURST):
         self.requests_per_window = requests_per_window
         self.window_seconds = window_seconds
-        self.request_times = deque()
+        self.burst = max(1, min(burst, requests_per_window - 1))
+        self.rate = max(requests_per_window - self.burst, 1) / window_seconds
+        self.tokens = float(self.burst)
+        self.last_refill = time.monotonic()
         self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+
+    def _tokens_at(self, now):
+        """Return the number of tokens available at ``now``, without mutating state."""
+        return min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+
+    def _refill(self, now):
+        """Credit the tokens accrued since the last refill."""
+        self.tokens = self._tokens_at(now)
+        self.last_refill = now
 
     def wait_if_needed(self):
         """Wait if necessary to respect rate limits."""
-        with self.lock:
-            now = time.time()
+        with self.cond:
+            now = time.monotonic()
+            self._refill(now)
 
-            # Remove old requests outside the window
-            while self.request_times and now - self.request_times[0] >= self.window_seconds:
-                self.request_times.popleft()
-
-            # Check if we're at the limit
-            if len(self.request_times) >= self.requests_per_window:
-                # Calculate how long to wait
-                oldest_request = self.request_times[0]
-                wait_time = self.window_seconds - \
-                    (now - oldest_request) + SAFETY_MARGIN
-
-                if wait_time > 0:
-                    print(f"⏱️ Rate limit reached. Waiting {wait_time:.1f} seconds...")
-                    # Release the lock while waiting
-                    self.lock.release()
-                    time.sleep(wait_time)
-                    # Reacquire the lock
-                    self.lock.acquire()
-                    
-                    # After waiting, recalculate and clean up old requests
-                    now = time.time()
-                    while self.request_times and now - self.request_times[0] >= self.window_seconds:
-                        self.request_times.popleft()
-
-            # Add current request
-            self.request_times.append(now)
+            # Check if we're out of tokens
+            while self.tokens < 1:
+                wait_time = (1 - self.tokens) / self.rate + SAFETY_MARGIN
+                logger.info("⏱️ Rate limit reached. Waiting %.1f seconds...", wait_time)
+                # Waiting releases the lock and reacquires it even if interrupted
+                self.cond.wait(timeout=wait_time)
 
-    def get_status(self):
-        """Get current rate limit status."""
-        with self.lock:
-            now = time.time()
+                # After waiting, credit the tokens accrued while asleep
+                self._refill(time.monotonic())
 
-            # Remove old requests
-            while self.request_times and now - self.request_times[0] >= self.window_seconds:
-                self.request_times.popleft()
+            # Consume a token for the current request
+            self.tokens -= 1
 
-            return {
-                "requests_in_window": len(self.request_times),
-                "max_requests": self.requests_per_window,
-                "window_seconds": self.window_seconds,
-                "time_until_reset": max(0, self.window_seconds - (now - self.request_times[0])) if self.request_times else 0
-            }
+    def pause(self, seconds):
+        """Hold back every caller for ``seconds``, e.g. after the server answers 429.
+
+        The bucket is drained below zero so that wait_if_needed in every thread
+        sleeps until the pause is over, not just the thread that saw the 429.
+        """
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def get_status(self):
+        """Get current rate limit status.
+
+        Reads the bucket without taking the lock; the result is advisory and
+        admission decisions stay serialized in wait_if_needed. The window
+        usage is estimated from how far the bucket is drained (full bucket: 0,
+        empty: the limit) and is clamped to the limit, since pause() drains
+        the bucket below zero without any requests being made.
+        """
+        tokens = self._tokens_at(time.monotonic())
+        used = (self.burst - tokens) / self.burst * self.requests_per_window
+
+        return MinuteStatus(
+            requests_in_window=min(self.requests_per_window, max(0, round(used))),
+            max_requests=self.requests_per_window,
+            window_seconds=self.window_seconds,
+            time_until_reset=max(0.0, (1 - tokens) / self.rate)
+        )
 
 
 # Global rate limiter instances
 _rate_limiter = RateLimiter()
 _daily_limiter = DailyRateLimiter()
 
-# Simple in-memory cache for LLM responses
-_llm_response_cache = {}
+# Shared HTTP session so OpenRouter calls reuse pooled keep-alive connections.
+# The adapter only retries failed connections and 5xx responses. It must not
+# honour Retry-After (urllib3 would otherwise retry 429s itself, sleeping up to
+# hours and bypassing the rate limiters; 429s are handled in
+# make_rate_limited_request) and must not resend a POST after a read timeout,
+# since the completion may already be generating and billed.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=MAX_WORKERS,  # One keep-alive connection per assess_many worker
+    max_retries=Retry(
+        total=3,
+        read=0,
+        backoff_factor=1,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+        respect_retry_after_header=False,
+        raise_on_status=False
+    )
+))
+
+# Simple in-memory LRU cache for LLM responses, shared by the worker threads
+_llm_response_cache = OrderedDict()
+_llm_response_cache_lock = threading.Lock()
+
+
+def _cache_get(cache_key: str):
+    """Return the in-memory cached result for cache_key, or None, marking it recently used."""
+    with _llm_response_cache_lock:
+        result = _llm_response_cache.get(cache_key)
+        if result is not None:
+            _llm_response_cache.move_to_end(cache_key)
+        return result
+
+
+def _cache_put(cache_key: str, result) -> None:
+    """Store a result in the in-memory cache, evicting the least recently used entries."""
+    with _llm_response_cache_lock:
+        _llm_response_cache[cache_key] = result
+        _llm_response_cache.move_to_end(cache_key)
+        while len(_llm_response_cache) > MAX_CACHE_ENTRIES:
+            _llm_response_cache.popitem(last=False)
 
 
-def get_cache_key(text: str, model: str, function_name: str) -> str:
+def get_cache_key(text: str, model: str, function_name: str, temperature: float = None, feed_type: str = None) -> str:
     """Generate a cache key for LLM responses.
-    
+
     Args:
         text: The input text
         model: The model name
         function_name: The function name (to avoid collisions between different functions)
-        
+        temperature: The sampling temperature
+        feed_type: The feed type, which selects the system prompt
+
+    Returns:
+        str: SHA-256 hex digest of the canonical JSON form of the arguments and PROMPT_VERSION
+    """
+    key_data = {"f": function_name, "m": model, "t": text, "temp": temperature, "feed": feed_type,
+                "v": PROMPT_VERSION}
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _lookup_cached(cache_key: str, temperature: float, function_name: str, text: str = None, scope: str = None):
+    """Look a result up in memory, then the persistent cache, then (if enabled) by similarity.
+
+    Args:
+        cache_key: Key from get_cache_key
+        temperature: Sampling temperature of the call
+        function_name: Name of the cached function, for logging
+        text: The input text; needed for the semantic lookup
+        scope: Scope from LLMCache.make_scope; needed for the semantic lookup
+
     Returns:
-        str: A cache key
+        Tuple containing:
+        - The cached result, or None on a miss
+        - The text's embedding if it was computed for the semantic lookup, so
+          _store_cached can index the new result without encoding it again
     """
-    # Use the first 100 chars of text + model + function name as the key
-    # This is a simple approach - for production, consider using a hash function
-    return f"{function_name}:{model}:{text[:100]}"
+    result = _cache_get(cache_key)
+    if result is not None:
+        logger.info("✅ Using cached LLM response for %s", function_name)
+        return result, None
+
+    persistent_cache = get_persistent_cache() if LLMCache.is_cacheable(temperature) else None
+    if persistent_cache is None:
+        return None, None
+
+    cached = persistent_cache.get(cache_key)
+    if cached is not None:
+        logger.info("✅ Using persisted LLM response for %s", function_name)
+        result = tuple(cached)
+        _cache_put(cache_key, result)
+        return result, None
+
+    # Fall back to a near-duplicate of a paper assessed before
+    if not SEMANTIC_CACHE_ENABLED or text is None or scope is None:
+        return None, None
+    embedding = get_embedding_model().encode(text, normalize_embeddings=True)
+    cached = persistent_cache.get_similar(scope, embedding)
+    if cached is not None:
+        logger.info("✅ Using LLM response of a near-duplicate paper for %s", function_name)
+        result = tuple(cached)
+        _cache_put(cache_key, result)
+        return result, None
+    return None, embedding
+
+
+def _store_cached(cache_key: str, temperature: float, result, scope: str = None, embedding=None) -> bool:
+    """Cache a result in memory and, if it came from the API, on disk.
+
+    When an embedding from _lookup_cached is given, the result is also
+    indexed for later semantic lookups within scope.
+
+    Returns:
+        bool: True if the result was persisted
+    """
+    # Never cache error fallbacks; caching them would turn one transient failure
+    # or malformed reply into a lasting false negative for this paper
+    if isinstance(result, _FallbackResult):
+        return False
+    _cache_put(cache_key, result)
+
+    # Only persist answers that came from the API; keyword prefilter results are cheap to redo
+    persistent_cache = get_persistent_cache() if LLMCache.is_cacheable(temperature) else None
+    if persistent_cache is None or result[1] <= 0:
+        return False
+    persistent_cache.set(cache_key, list(result))
+    if embedding is not None and scope is not None:
+        persistent_cache.add_similar(scope, embedding, list(result))
+    return True
+
+
+def cached_llm_call(func=None, *, prefilter=None):
+    """Decorator to cache LLM responses.
 
+    Results are kept in memory for the current run and, when they came from a
+    successful API call, in the persistent on-disk cache so later runs can
+    reuse them without touching the rate limiters.
 
-def cached_llm_call(func):
-    """Decorator to cache LLM responses."""
+    Args:
+        func: The function to wrap
+        prefilter: Optional prefilter(text, feed_type) returning a result when
+            keywords decide the case without an API call, or None. It runs
+            before any cache lookup, so decided papers are never embedded.
+    """
+    if func is None:
+        return lambda f: cached_llm_call(f, prefilter=prefilter)
+
+    signature = inspect.signature(func)
+
+    @wraps(func)
     def wrapper(*args, **kwargs):
-        global _llm_response_cache
-        
-        # Extract relevant parameters for cache key
-        text = args[0] if len(args) > 0 else kwargs.get('text', '')
-        model = kwargs.get('model', args[3] if len(args) > 3 else None)
-        
+        # Extract relevant parameters for cache key, filling in defaults
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        text = bound.arguments["text"]
+        model = bound.arguments["model"]
+        temperature = bound.arguments["temperature"]
+        feed_type = bound.arguments["feed_type"]
+
+        if prefilter is not None:
+            prefiltered = prefilter(text, feed_type)
+            if prefiltered is not None:
+                return prefiltered
+
         # Generate cache key
-        cache_key = get_cache_key(text, model, func.__name__)
-        
-        # Check if we have a cached response
-        if cache_key in _llm_response_cache:
-            print(f"✅ Using cached LLM response for {func.__name__}")
-            return _llm_response_cache[cache_key]
+        cache_key = get_cache_key(text, model, func.__name__, temperature, feed_type)
+        scope = LLMCache.make_scope(func.__name__, model, temperature, feed_type, PROMPT_VERSION)
+
+        # Check this run's cache, the persistent cache from earlier runs and near-duplicates
+        result, embedding = _lookup_cached(cache_key, temperature, func.__name__, text, scope)
+        if result is not None:
+            return result
         
         # If not in cache, call the function
         result = func(*args, **kwargs)
         
-        # Cache the result
-        _llm_response_cache[cache_key] = result
+        _store_cached(cache_key, temperature, result, scope, embedding)
         
         return result
     
     return wrapper
 
 
+def prefetch_cached_results(func, texts: List[str], model: str, temperature: float = 0.1, feed_type: str = "ai-security") -> int:
+    """Load persisted results for many texts into the in-memory cache with one bulk query.
+
+    Call once per pipeline stage, before the texts are assessed, so that each
+    paper's cache check becomes a dictionary lookup instead of its own query.
+
+    Args:
+        func: The cached assessment function the texts will be passed to
+        texts: The texts that will be assessed
+        model: Model the texts will be assessed with
+        temperature: Sampling temperature
+        feed_type: Feed the texts are assessed for
+
+    Returns:
+        int: Number of results loaded
+    """
+    if not LLMCache.is_cacheable(temperature):
+        return 0
+    keys = list({get_cache_key(text, model, func.__name__, temperature, feed_type) for text in texts})
+    cached = prefetch_cache([key for key in keys if _cache_get(key) is None])
+    for key, value in cached.items():
+        _cache_put(key, tuple(value))
+    if cached:
+        logger.info("✅ Prefetched %d persisted LLM responses for %s", len(cached), func.__name__)
+    return len(cached)
+
+
 def get_rate_limiter():
     """Get the global rate limiter instance."""
     return _rate_limiter
@@ -235,26 +639,60 @@ def get_daily_limiter():
 
 def is_free_model(model_name):
     """Check if a model is a free model variant."""
-    return model_name and model_name.endswith(':free')
+    return bool(model_name) and model_name.endswith(':free')
 
 def is_exempt_from_rate_limit(model_name):
     """Check if a model should be exempt from the rate limit counter.
     
     Some models like gpt-4.1-nano are not counted toward the OpenRouter free tier limit.
     """
-    exempt_models = [
-        "openai/gpt-4.1-nano",
-        # Add other models that don't count toward the rate limit
-    ]
-    return model_name in exempt_models
+    return model_name in RATE_LIMIT_EXEMPT_MODELS
 
 
 def update_daily_limit_for_paid_user():
     """Update daily limit for users who have purchased 10+ credits."""
     global _daily_limiter
     _daily_limiter = DailyRateLimiter(FREE_TIER_DAILY_LIMIT_PAID)
-    print(
-        f"✅ Updated daily limit to {FREE_TIER_DAILY_LIMIT_PAID} requests/day (paid user)")
+    logger.info("✅ Updated daily limit to %d requests/day (paid user)", FREE_TIER_DAILY_LIMIT_PAID)
+
+
+def _backoff_delay(retry_delay, attempt):
+    """Return a jittered exponential backoff delay for the given attempt, capped at MAX_RETRY_DELAY.
+
+    The jitter keeps concurrent workers that failed together from retrying in lockstep.
+    """
+    return min(retry_delay * (2 ** attempt) * random.uniform(0.5, 1.5), MAX_RETRY_DELAY)
+
+
+def _retry_after_seconds(response):
+    """Return the server-advised wait before retrying a 429, or None if the response gives none.
+
+    Retry-After is in seconds or an HTTP date; OpenRouter's X-RateLimit-Reset
+    is a Unix timestamp in milliseconds. The wait is returned uncapped so the
+    caller can tell a multi-hour quota reset from a short backoff.
+    """
+    retry_after = response.headers.get('retry-after')
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass  # Unparseable; fall back to the reset header
+
+    reset = response.headers.get('x-ratelimit-reset')
+    if reset is not None:
+        try:
+            reset = float(reset)
+        except ValueError:
+            return None
+        if reset > 1e11:  # Milliseconds rather than seconds
+            reset /= 1000
+        return max(0.0, reset - time.time())
+
+    return None
 
 
 def make_rate_limited_request(url, headers, payload, max_retries=3, retry_delay=1):
@@ -267,6 +705,9 @@ def make_rate_limited_request(url, headers, payload, max_retries=3, retry_delay=
     is_free = is_free_model(model_name)
     is_exempt = is_exempt_from_rate_limit(model_name)
 
+    # Serialize once up front rather than on every retry
+    body = _dumps(payload)
+
     for attempt in range(max_retries):
         try:
             # Check daily limit for free models
@@ -278,31 +719,39 @@ def make_rate_limited_request(url, headers, payload, max_retries=3, retry_delay=
             if not is_exempt:
                 rate_limiter.wait_if_needed()
 
-            # Make the request
-            response = requests.post(
-                url, headers=headers, json=payload, timeout=30)
+            # Make the request; headers already carry Content-Type: application/json
+            response = _SESSION.post(
+                url, headers=headers, data=body, timeout=30)
 
             # Handle rate limit errors - wait and retry
             if response.status_code == 429:
-                # Get retry-after header if available, otherwise use default wait time
-                retry_after = int(response.headers.get('retry-after', 60))
-                print(f"⏱️ Rate limit hit on attempt {attempt + 1}. Waiting {retry_after} seconds...")
-                
-                if is_free:
-                    print(f"💡 You've reached the OpenRouter free tier limit (20 requests/minute).")
-                else:
-                    print(f"💡 You've reached the OpenRouter rate limit.")
-                
+                # Follow the server's advice if given, otherwise wait out a full window
+                advised = _retry_after_seconds(response)
+                if advised is None:
+                    advised = FREE_TIER_WINDOW_SECONDS
+                # A daily quota 429 advises waiting until midnight UTC; like DailyRateLimiter,
+                # give up rather than sleep (and stall every worker) for hours
+                if advised > MAX_RATE_LIMIT_WAIT:
+                    logger.error("❌ Rate limit resets in %.1f seconds, too long to wait. Terminating process.",
+                                 advised)
+                    exit(1)
+                retry_after = max(advised, _backoff_delay(retry_delay, attempt)) + random.uniform(0, 0.5)
+                logger.info("⏱️ Rate limit hit on attempt %d. Waiting %.1f seconds...", attempt + 1, retry_after)
+                logger.debug("💡 You've reached the OpenRouter %s.",
+                             "free tier limit (20 requests/minute)" if is_free else "rate limit")
+                # Hold back the other workers too, so they do not walk into the same 429
+                if not is_exempt:
+                    rate_limiter.pause(retry_after)
                 time.sleep(retry_after)
                 continue
 
-            # Handle other errors
+            # Handle other errors (server errors were already retried by the session adapter)
             if response.status_code != 200:
-                print(
-                    f"❌ API request failed with status {response.status_code}: {response.text}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
+                logger.error("❌ API request failed with status %d: %s", response.status_code,
+                             response.content[:512].decode("utf-8", "replace"))
+                if (attempt < max_retries - 1 and response.status_code < 500
+                        and response.status_code not in NON_RETRYABLE_STATUS_CODES):
+                    time.sleep(_backoff_delay(retry_delay, attempt))
                     continue
                 else:
                     response.raise_for_status()
@@ -310,10 +759,9 @@ def make_rate_limited_request(url, headers, payload, max_retries=3, retry_delay=
             return response
 
         except requests.exceptions.RequestException as e:
-            print(f"❌ Request error on attempt {attempt + 1}: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                retry_delay *= 2
+            logger.error("❌ Request error on attempt %d: %s", attempt + 1, e)
+            if attempt < max_retries - 1 and not isinstance(e, requests.exceptions.HTTPError):
+                time.sleep(_backoff_delay(retry_delay, attempt))
             else:
                 raise
 
@@ -328,212 +776,249 @@ def check_rate_limit_status():
     minute_status = rate_limiter.get_status()
     daily_status = daily_limiter.get_status()
 
-    print(f"📊 Rate Limit Status:")
-    print(
-        f"  Minute Window: {minute_status['requests_in_window']}/{minute_status['max_requests']} requests")
-    print(
-        f"  Time until minute window resets: {minute_status['time_until_reset']:.2f} seconds")
-    print(
-        f"  Daily Usage: {daily_status['requests_today']}/{daily_status['daily_limit']} requests")
-    print(f"  Remaining today: {daily_status['remaining_today']} requests")
+    # Skip building the report entirely when nobody will see it
+    if not logger.isEnabledFor(logging.INFO):
+        return minute_status, daily_status
+
+    logger.info("📊 Rate Limit Status:")
+    logger.info("  Minute Window: %d/%d requests",
+                minute_status.requests_in_window, minute_status.max_requests)
+    logger.info("  Time until minute window resets: %.2f seconds", minute_status.time_until_reset)
+    logger.info("  Daily Usage: %d/%d requests", daily_status.requests_today, daily_status.daily_limit)
+    logger.info("  Remaining today: %d requests", daily_status.remaining_today)
 
     # Minute window analysis
-    if minute_status['requests_in_window'] >= minute_status['max_requests']:
-        print("  ⚠️ Minute rate limit window is full!")
-    elif minute_status['requests_in_window'] >= minute_status['max_requests'] * 0.8:
-        print("  ⚠️ Approaching minute rate limit!")
+    if minute_status.requests_in_window >= minute_status.max_requests:
+        logger.info("  ⚠️ Minute rate limit window is full!")
+    elif minute_status.requests_in_window >= minute_status.max_requests * 0.8:
+        logger.info("  ⚠️ Approaching minute rate limit!")
     else:
-        print("  ✅ Minute rate limit window has capacity")
+        logger.info("  ✅ Minute rate limit window has capacity")
 
     # Daily limit analysis
-    if daily_status['requests_today'] >= daily_status['daily_limit']:
-        print("  ⚠️ Daily limit reached!")
-    elif daily_status['requests_today'] >= daily_status['daily_limit'] * 0.8:
-        print("  ⚠️ Approaching daily limit!")
+    if daily_status.requests_today >= daily_status.daily_limit:
+        logger.info("  ⚠️ Daily limit reached!")
+    elif daily_status.requests_today >= daily_status.daily_limit * 0.8:
+        logger.info("  ⚠️ Approaching daily limit!")
     else:
-        print("  ✅ Daily limit has capacity")
+        logger.info("  ✅ Daily limit has capacity")
 
     return minute_status, daily_status
 
 
-def create_openrouter_client(api_key: str):
-    """Create an OpenRouter client using requests."""
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "https://paper-digest.com",  # Replace with your domain
-        "X-Title": "Paper Digest"  # Replace with your app name
-    }
-    return headers
+def keyword_prefilter(text: str, feed_type: str = "ai-security"):
+    """Classify a paper from keywords alone when the signal is unambiguous.
 
+    Returns True or False when the keywords decide the case, or None when
+    the paper should go to the LLM.
+    """
+    if feed_type != "ai-security":
+        return None
 
-def clean_and_extract_json(response_text: str) -> dict:
-    """Clean response text and extract JSON, handling thinking tokens and other formatting.
+    relevant = {match.lastgroup for match in _RELEVANT_KEYWORDS.finditer(text)}
+    irrelevant = _IRRELEVANT_KEYWORDS.search(text) is not None
+
+    # Only reject off-topic domains that carry no security vocabulary at all;
+    # e.g. "a model inversion attack on radiology classifiers" still goes to the model
+    if irrelevant and not relevant and _SECURITY_TERMS.search(text) is None:
+        return False
+    if len(relevant) >= 2 and not irrelevant:
+        return True
+    return None
+
+
+def _relevance_prefilter(text: str, feed_type: str) -> Optional[Tuple[Dict[str, Any], int]]:
+    """Reject obviously off-topic papers without an API call.
 
-    Returns a default dict with 'relevant': False if JSON parsing fails.
+    A positive keyword match still needs the model for the summary and tags,
+    so only rejections are decided here.
     """
+    if keyword_prefilter(text, feed_type) is False:
+        logger.info("⚡ Keyword prefilter rejected the paper without an API call")
+        return {"relevant": False}, 0
+    return None
 
-    # Remove thinking tokens and other common formatting
-    cleaned = response_text
 
-    # Remove thinking tokens (◁think▷ and ◁/think▷)
-    cleaned = re.sub(r'◁think▷.*?◁/think▷', '', cleaned, flags=re.DOTALL)
+def _quick_prefilter(text: str, feed_type: str) -> Optional[Tuple[bool, int]]:
+    """Decide the quick screen without an API call when keywords are unambiguous."""
+    prefiltered = keyword_prefilter(text, feed_type)
+    if prefiltered is None:
+        return None
+    logger.info("⚡ Keyword prefilter decided without an API call: %s",
+                "relevant" if prefiltered else "not relevant")
+    return prefiltered, 0
 
-    # Remove other common thinking/reasoning tokens
-    thinking_patterns = [
-        r'<think>.*?</think>',
-        r'<reasoning>.*?</reasoning>',
-        r'<analysis>.*?</analysis>',
-        r'<thought>.*?</thought>',
-        r'<step>.*?</step>',
-        r'<process>.*?</process>'
-    ]
 
-    for pattern in thinking_patterns:
-        cleaned = re.sub(pattern, '', cleaned, flags=re.DOTALL)
+# Headers that are the same for every OpenRouter request; only Authorization varies per key
+_BASE_HEADERS = {
+    "Content-Type": "application/json",
+    "HTTP-Referer": "https://paper-digest.com",  # Replace with your domain
+    "X-Title": "Paper Digest"  # Replace with your app name
+}
 
-    # Remove leading/trailing whitespace and newlines
-    cleaned = cleaned.strip()
 
-    # Try to parse as JSON first
-    try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
-        pass
+@lru_cache(maxsize=4)
+def create_openrouter_client(api_key: str):
+    """Create OpenRouter request headers for the given API key.
 
-    # Look for JSON object in the cleaned text
-    json_match = re.search(
-        r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', cleaned, re.DOTALL)
-    if json_match:
-        try:
-            json_str = json_match.group(0)
-            result = json.loads(json_str)
-            return result
-        except json.JSONDecodeError as e:
-            print(f"❌ Failed to parse extracted JSON: {json_str}")
-            print(f"❌ JSON parsing error: {e}")
-            print(f"❌ Original response: {response_text[:500]}...")
-            return {"relevant": False}
-
-    # Try a more aggressive JSON extraction
-    json_match = re.search(r'\{.*\}', cleaned, re.DOTALL)
-    if json_match:
-        try:
-            json_str = json_match.group(0)
-            result = json.loads(json_str)
-            return result
-        except json.JSONDecodeError as e:
-            print(f"❌ Failed to parse extracted JSON: {json_str}")
-            print(f"❌ JSON parsing error: {e}")
-            print(f"❌ Original response: {response_text[:500]}...")
-            return {"relevant": False}
+    The headers are built once per key and returned as a read-only mapping
+    so they can be shared safely between calls and threads.
+    """
+    return MappingProxyType({**_BASE_HEADERS, "Authorization": f"Bearer {api_key}"})
 
-    # Fallback: try to evaluate as Python dict (less safe but sometimes works)
-    try:
-        # Remove any remaining non-JSON text
-        json_only = re.sub(r'^[^{]*', '', cleaned)
-        json_only = re.sub(r'[^}]*$', '', json_only)
-        result = eval(json_only)
-        return result
-    except Exception as e:
-        print(f"❌ Failed to parse extracted JSON: {json_only}")
-        print(f"❌ Evaluation error: {e}")
-        print(f"❌ Original response: {response_text[:500]}...")
-        return {"relevant": False}
 
-    # If all else fails, return default
-    print(
-        f"❌ Could not extract valid JSON from response: {response_text[:500]}...")
-    print(f"❌ Cleaned response: {cleaned[:500]}...")
-    return {"relevant": False}
+def _extract_content(raw_body: bytes) -> Tuple[str, Dict[str, int]]:
+    """Return the message content and usage block from a raw chat completion body.
 
+    The body is parsed straight from bytes and only these two fields are kept,
+    so the rest of the envelope is released as soon as this returns.
+    """
+    result_data = _loads(raw_body)
+    return result_data["choices"][0]["message"]["content"], result_data.get("usage", {})
 
-@cached_llm_call
-def assess_relevance_and_tags(text: str, api_key: str, temperature: float = 0.1, model: str = "openai/gpt-4o", feed_type: str = "ai-security") -> Tuple[Dict[str, Any], int]:
-    """Assess if a paper is relevant and extract tags using OpenRouter."""
-    headers = create_openrouter_client(api_key)
 
-    # Optimized prompt to reduce token usage while maintaining essential instructions
-    if feed_type == "web3-security":
-        system_prompt = """Assess if this paper directly addresses vulnerabilities in smart contracts, blockchains, or Web3 systems.
+def _chat_completion(system_message: Dict[str, str], user_content: str, *, model: str, temperature: float, api_key: str,
+                     response_format: Dict[str, str] = None) -> Tuple[str, Dict[str, int]]:
+    """Send a single chat completion request to OpenRouter.
 
-ONLY RELEVANT if the paper:
-- Identifies, analyzes, or prevents vulnerabilities in smart contracts (e.g., reentrancy, integer overflow, access control flaws)
-- Studies security flaws in DeFi protocols (e.g., flash loan exploits, MEV attacks, oracle manipulation)
-- Analyzes blockchain consensus vulnerabilities or attacks (e.g., 51% attacks, selfish mining, double-spending)
-- Develops tools for smart contract security (e.g., auditing tools, formal verification, vulnerability detection)
-- Examines bridge vulnerabilities, Layer 2 security flaws, or cross-chain attack vectors
-- Studies cryptocurrency wallet/exchange security vulnerabilities or blockchain attack techniques
+    Every assessment goes through this function, so request-level concerns
+    (headers, payload layout, rate limiting, response parsing) live in one place.
+    system_message is one of the prebuilt module-level message dicts and is
+    shared across requests, so it must not be modified.
 
-NOT RELEVANT:
-- Papers using blockchain as a data management layer or infrastructure for other purposes (e.g., "blockchain for IoT security", "blockchain-based access control")
-- General privacy technologies that happen to use blockchain (e.g., decentralized identity without vulnerability focus)
-- Cryptocurrency trading, economics, or market analysis without security vulnerability aspects
-- Blockchain applications without vulnerability or security flaw analysis
-- Papers about blockchain benefits, performance, or general system design without security vulnerability focus
+    Returns:
+        Tuple containing:
+        - The message content returned by the model
+        - The usage block (prompt_tokens, completion_tokens, total_tokens)
+    """
+    payload = {
+        "model": model,
+        "messages": [
+            system_message,
+            {"role": "user", "content": user_content}
+        ],
+        "temperature": temperature
+    }
+    if response_format is not None:
+        payload["response_format"] = response_format
 
-If relevant (score ≥3/5):
-- Summary (2-4 bullet points)
-- 3-5 tags
-- Relevance score (1-5)
-- Brief reason for score
-- Paper type (Research/Survey/Benchmarking/Position/Other)
-- Modalities (Text/Image/Video/Audio/Multimodal/Other)
+    response = make_rate_limited_request(
+        CHAT_COMPLETIONS_URL,
+        headers=create_openrouter_client(api_key),
+        payload=payload
+    )
+    return _extract_content(response.content)
 
-If not relevant: {"relevant": false}
 
-IMPORTANT: Output ONLY valid JSON. No explanations, no thinking tokens, no markdown. Just the JSON object."""
-    else:
-        system_prompt = """Assess if this paper is about AI SECURITY VULNERABILITIES, ATTACKS, or DEFENSES.
+def _extract_json_span(text: str, start: int) -> Optional[str]:
+    """Return the balanced {...} span opening at text[start], or None if it never closes.
 
-ONLY RELEVANT if the paper:
-- Studies attack methods: jailbreaking, prompt injection, adversarial examples, model extraction, data poisoning, 
-- Develops defense mechanisms: guardrails, safety mechanisms, attack detection/prevention, robustness techniques, input validation
-- Performs red teaming: systematically testing models for vulnerabilities, adversarial safety evaluation
-- Analyzes privacy vulnerabilities: membership inference, model inversion, training data extraction, unintended memorization
-- Develops security tools: vulnerability scanners, automated red teaming systems, security benchmarks WITH attack scenarios
+    Braces inside JSON strings (including escaped quotes) are ignored, so this
+    handles arbitrarily nested objects in a single linear scan.
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
 
-NOT RELEVANT:
-- General AI capabilities, performance benchmarks, or domain applications (medical, IoT, legal, etc.) without security/attack analysis
-- General alignment, helpfulness, or capability improvements without vulnerability/attack focus
-- AI ethics, fairness, bias, or responsibility without specific security vulnerability analysis
-- General reasoning, chain-of-thought, or prompting techniques without adversarial/security context
-- Federated/distributed learning, model compression, efficiency, unlearning
-- Any paper where security/attacks are not the PRIMARY focus
 
-If relevant (score ≥3/5):
-- Summary (2-4 bullet points)
-- 3-5 tags
-- Relevance score (1-5)
-- Brief reason for score
-- Paper type (Research/Survey/Benchmarking/Position/Other)
-- Modalities (Text/Image/Video/Audio/Multimodal/Other)
+def clean_and_extract_json(response_text: str) -> dict:
+    """Clean response text and extract JSON, handling thinking tokens and other formatting.
+
+    Raises JSONExtractionError if no JSON object can be decoded from the response.
+    """
 
-If not relevant: {"relevant": false}
+    # Fast path: most responses are a bare JSON object, sometimes inside a ```json fence
+    candidate = response_text.strip()
+    if candidate.startswith("```"):
+        candidate = candidate.partition("\n")[2].rpartition("```")[0].strip()
+    if candidate.startswith("{"):
+        try:
+            return _loads(candidate)
+        except json.JSONDecodeError:
+            pass
 
-IMPORTANT: Output ONLY valid JSON. No explanations, no thinking tokens, no markdown. Just the JSON object."""
+    # Remove thinking/reasoning tokens in a single pass
+    cleaned = _THINK_RE.sub('', response_text)
 
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": text}
-        ],
-        "temperature": temperature,
-        "response_format": {"type": "json_object"}
-    }
+    # Remove leading/trailing whitespace and newlines
+    cleaned = cleaned.strip()
 
+    # Try to parse as JSON first
     try:
-        response = make_rate_limited_request(
-            f"{OPENROUTER_BASE_URL}/chat/completions",
-            headers=headers,
-            payload=payload
-        )
-        result_data = response.json()
-        result = result_data["choices"][0]["message"]["content"]
-        
+        return _loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+
+    # Parse the first balanced JSON object found at any '{' in the cleaned text
+    start = cleaned.find('{')
+    while start != -1:
+        span = _extract_json_span(cleaned, start)
+        if span is not None:
+            try:
+                return _loads(span)
+            except json.JSONDecodeError:
+                pass
+            # Trailing commas are the most common slip in otherwise valid output
+            repaired = _TRAILING_COMMA_RE.sub(r'\1', span)
+            if repaired != span:
+                try:
+                    return _loads(repaired)
+                except json.JSONDecodeError:
+                    pass
+            # Some models answer with single-quoted keys/strings; retry with them swapped
+            try:
+                return _loads(_SINGLE_QUOTE_RE.sub('"', span))
+            except json.JSONDecodeError:
+                pass
+            # Last resort for Python-style literals ({'relevant': True}); literal_eval
+            # only parses literals, so nothing in the response is executed
+            try:
+                result = ast.literal_eval(span)
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                result = None
+            if isinstance(result, dict):
+                return result
+        start = cleaned.find('{', start + 1)
+
+    logger.error("❌ Could not extract valid JSON from response: %s...", response_text[:500])
+    logger.error("❌ Cleaned response: %s...", cleaned[:500])
+    raise JSONExtractionError(
+        f"Could not extract valid JSON from response: {response_text[:100]}...")
+
+
+@cached_llm_call(prefilter=_relevance_prefilter)
+def assess_relevance_and_tags(text: str, api_key: str, temperature: float = 0.1, model: str = DEFAULT_MINI_MODEL, feed_type: str = "ai-security") -> Tuple[Dict[str, Any], int]:
+    """Assess if a paper is relevant and extract tags using OpenRouter.
+
+    Obviously off-topic papers are rejected by _relevance_prefilter in the
+    caching wrapper before this runs.
+    """
+    system_message = _RELEVANCE_SYSTEM_MESSAGES.get(feed_type, _RELEVANCE_SYSTEM_MESSAGES["ai-security"])
+
+    try:
+        result, usage = _chat_completion(
+            system_message, text, model=model, temperature=temperature, api_key=api_key,
+            response_format={"type": "json_object"})
+
         # Extract token usage
-        usage = result_data.get("usage", {})
         input_tokens = usage.get("prompt_tokens", 0)
         output_tokens = usage.get("completion_tokens", 0)
         total_tokens = usage.get("total_tokens", input_tokens + output_tokens)
@@ -542,25 +1027,223 @@ IMPORTANT: Output ONLY valid JSON. No explanations, no thinking tokens, no markd
         cost = calculate_cost(input_tokens, output_tokens, model)
         
         # Use the improved JSON extraction function
-        result_dict = clean_and_extract_json(result)
+        try:
+            result_dict = clean_and_extract_json(result)
+        except JSONExtractionError:
+            return _FallbackResult(({"relevant": False}, total_tokens))
 
         # Ensure the result has a 'relevant' key - if missing, default to False
         if "relevant" not in result_dict:
-            print(f"⚠️ Warning: API response missing 'relevant' key. Response: {result[:500]}...")
+            logger.warning("⚠️ Warning: API response missing 'relevant' key. Response: %s...", result[:500])
             result_dict["relevant"] = False
 
         # Add cost information to the result for display
         if cost > 0:
-            print(f"💰 Relevance assessment cost: {format_cost(cost)}")
+            logger.info("💰 Relevance assessment cost: %s", format_cost(cost))
 
         return result_dict, total_tokens
 
     except Exception as e:
-        print(f"❌ Error calling OpenRouter API: {str(e)}")
-        return {"relevant": False}, 0
+        logger.error("❌ Error calling OpenRouter API: %s", e)
+        return _FallbackResult(({"relevant": False}, 0))
+
+
+def assess_relevance_and_tags_batch(texts: List[str], api_key: str, temperature: float = 0.1, model: str = DEFAULT_MINI_MODEL, feed_type: str = "ai-security") -> List[Tuple[Dict[str, Any], int]]:
+    """Assess several papers for relevance and tags with a single request.
+
+    The system prompt is sent once for the whole batch, so each paper costs
+    one user-message entry rather than a full request against the rate limit.
+    Papers the keyword prefilter rejects or that are already cached are not
+    sent, and papers the model leaves out of its answer are assessed
+    individually. Results share the cache entries of assess_relevance_and_tags.
+
+    Args:
+        texts: The texts to assess, one per paper
+        api_key: OpenRouter API key
+        temperature: Temperature for the model (default: 0.1)
+        model: Model to use (default: DEFAULT_MINI_MODEL)
+        feed_type: Type of feed to assess for (default: ai-security)
+
+    Returns:
+        List of (result dict, tokens used) tuples in the same order as texts;
+        the batch's tokens are split evenly across its papers
+    """
+    # Apply the same keyword rejection and caching as assess_relevance_and_tags
+    function_name = assess_relevance_and_tags.__name__
+    scope = LLMCache.make_scope(function_name, model, temperature, feed_type, PROMPT_VERSION)
+    results = [None] * len(texts)
+    cache_keys = [get_cache_key(text, model, function_name, temperature, feed_type) for text in texts]
+    embeddings = {}
+    pending = []
+    for i, text in enumerate(texts):
+        results[i] = _relevance_prefilter(text, feed_type)
+        if results[i] is None:
+            results[i], embeddings[i] = _lookup_cached(cache_keys[i], temperature, function_name, text, scope)
+        if results[i] is None:
+            pending.append(i)
+    if not pending:
+        return results
+
+    system_message = _RELEVANCE_BATCH_SYSTEM_MESSAGES.get(feed_type, _RELEVANCE_BATCH_SYSTEM_MESSAGES["ai-security"])
+    user_content = _dumps([{"id": i, "text": texts[i]} for i in pending]).decode("utf-8")
+
+    by_id = {}
+    total_tokens = 0
+    try:
+        result, usage = _chat_completion(
+            system_message, user_content, model=model, temperature=temperature, api_key=api_key,
+            response_format={"type": "json_object"})
+
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+        total_tokens = usage.get("total_tokens", input_tokens + output_tokens)
+
+        cost = calculate_cost(input_tokens, output_tokens, model)
+        if cost > 0:
+            logger.info("💰 Batch relevance assessment cost (%d papers): %s", len(pending), format_cost(cost))
+
+        for item in clean_and_extract_json(result).get("results", []):
+            if isinstance(item, dict) and isinstance(item.get("id"), int):
+                by_id[item.pop("id")] = item
+    except Exception as e:
+        logger.error("❌ Error in batch relevance assessment: %s", e)
+
+    for i, share in zip(pending, _split_tokens(total_tokens, len(pending))):
+        result_dict = by_id.get(i)
+        if result_dict is None:
+            logger.warning("⚠️ Paper %d missing from batch response; assessing it on its own", i)
+            result_dict, tokens = assess_relevance_and_tags(
+                texts[i], api_key, temperature=temperature, model=model, feed_type=feed_type)
+            results[i] = (result_dict, tokens + share)
+            continue
+        result_dict.setdefault("relevant", False)
+        results[i] = (result_dict, share)
+        _store_cached(cache_keys[i], temperature, results[i], scope, embeddings.get(i))
+    return results
+
+
+def assess_many(texts: List[str], api_key: str, temperature: float = 0.1, model: str = DEFAULT_MINI_MODEL, feed_type: str = "ai-security", workers: int = MAX_WORKERS, batch_size: int = 1) -> List[Tuple[Dict[str, Any], int]]:
+    """Run assess_relevance_and_tags over many papers concurrently.
+
+    Each request spends most of its time waiting on the network, so a small
+    thread pool overlaps them while the shared rate limiters keep the overall
+    request rate within the OpenRouter limits.
+
+    Args:
+        texts: The texts to assess, one per paper
+        api_key: OpenRouter API key
+        temperature: Temperature for the model (default: 0.1)
+        model: Model to use (default: DEFAULT_MINI_MODEL)
+        feed_type: Type of feed to assess for (default: ai-security)
+        workers: Maximum number of requests in flight (default: MAX_WORKERS)
+        batch_size: Papers per request; above 1, papers are grouped with
+            assess_relevance_and_tags_batch (default: 1)
+
+    Returns:
+        List of (result dict, tokens used) tuples in the same order as texts
+    """
+    if batch_size <= 1:
+        return _map_concurrently(assess_relevance_and_tags, texts, api_key, temperature, model, feed_type, workers)
+
+    batch_results = _map_concurrently(
+        assess_relevance_and_tags_batch, _batches(texts, batch_size), api_key, temperature, model, feed_type, workers)
+    return [result for batch in batch_results for result in batch]
+
+
+def quick_assess_many(texts: List[str], api_key: str, temperature: float = 0.1, model: str = "openai/gpt-4.1-nano", feed_type: str = "ai-security", workers: int = MAX_WORKERS, batch_size: int = 1) -> List[Tuple[bool, int]]:
+    """Run quick_assess_relevance over many papers concurrently.
+
+    Args:
+        texts: The paper titles and abstracts, one per paper
+        api_key: OpenRouter API key
+        temperature: Temperature for the model (default: 0.1)
+        model: Model to use (default: openai/gpt-4.1-nano)
+        feed_type: Type of feed to assess for (default: ai-security)
+        workers: Maximum number of requests in flight (default: MAX_WORKERS)
+        batch_size: Papers per request; above 1, papers are grouped with
+            quick_assess_relevance_batch (default: 1)
+
+    Returns:
+        List of (potentially relevant, tokens used) tuples in the same order as texts
+    """
+    if batch_size <= 1:
+        return _map_concurrently(quick_assess_relevance, texts, api_key, temperature, model, feed_type, workers)
+
+    batch_results = _map_concurrently(
+        quick_assess_relevance_batch, _batches(texts, batch_size), api_key, temperature, model, feed_type, workers)
+    return [result for batch in batch_results for result in batch]
+
+
+def _map_concurrently(func, texts, api_key, temperature, model, feed_type, workers):
+    """Apply an assessment function to each text on a thread pool, keeping input order."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            lambda text: func(text, api_key, temperature=temperature, model=model, feed_type=feed_type),
+            texts))
+
+
+def _batches(texts: List[str], batch_size: int, char_budget: int = BATCH_CHAR_BUDGET) -> List[List[str]]:
+    """Group texts in order into batches of at most batch_size texts and roughly char_budget characters.
+
+    A single text longer than the budget still gets a batch of its own.
+    """
+    batches = []
+    current = []
+    current_chars = 0
+    for text in texts:
+        if current and (len(current) >= batch_size or current_chars + len(text) > char_budget):
+            batches.append(current)
+            current = []
+            current_chars = 0
+        current.append(text)
+        current_chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _split_tokens(total_tokens: int, count: int) -> List[int]:
+    """Split a batched request's token count evenly across its papers, keeping the exact total."""
+    shares = [total_tokens // count] * count
+    shares[0] += total_tokens % count
+    return shares
+
+
+def _is_yes(answer: str) -> bool:
+    """Interpret a quick assessment answer, which the prompt restricts to "yes" or "no".
+
+    Only the first few characters are inspected for the usual one-word answer;
+    anything else (a thinking block, "Answer: yes") falls back to a scan of the
+    text with thinking blocks removed.
+    """
+    head = answer[:16].lstrip().lower()
+    if head.startswith("yes"):
+        return True
+    if head.startswith("no"):
+        return False
+    return "yes" in _THINK_RE.sub('', answer).lower()
+
+
 
+def _parse_batch_answer(answer) -> Optional[bool]:
+    """Interpret one "answer" from a batched quick assessment.
 
-@cached_llm_call
+    Accepts "yes"/"no" strings as well as JSON booleans. Returns None for
+    anything else, so the paper is screened on its own instead of an unclear
+    answer being cached as a negative.
+    """
+    if isinstance(answer, bool):
+        return answer
+    if isinstance(answer, str):
+        head = answer[:16].strip().lower()
+        if head.startswith("yes"):
+            return True
+        if head.startswith("no"):
+            return False
+    return None
+
+
+@cached_llm_call(prefilter=_quick_prefilter)
 def quick_assess_relevance(text: str, api_key: str, temperature: float = 0.1, model: str = "openai/gpt-4.1-nano", feed_type: str = "ai-security") -> Tuple[bool, int]:
     """Quick assessment of paper relevance using a smaller, cheaper model.
 
@@ -580,59 +1263,84 @@ def quick_assess_relevance(text: str, api_key: str, temperature: float = 0.1, mo
         - Boolean indicating if the paper is potentially relevant
         - Number of tokens used
     """
-    headers = create_openrouter_client(api_key)
-
-    if feed_type == "web3-security":
-        system_prompt = """Determine if this paper is about vulnerabilities in smart contracts, blockchains, or Web3 systems.
-
-ONLY "yes" if about: smart contract vulnerabilities, DeFi security flaws, blockchain consensus attacks,
-security auditing tools, formal verification, exploit analysis, vulnerability detection,
-wallet/exchange security vulnerabilities, bridge attacks, Layer 2 security flaws.
+    # Papers the keywords already decide are answered by _quick_prefilter in
+    # the caching wrapper and never reach this point
+    system_message = _QUICK_SYSTEM_MESSAGES.get(feed_type, _QUICK_SYSTEM_MESSAGES["ai-security"])
 
-"no" if: using blockchain as infrastructure for other purposes, general privacy tech,
-trading/economics, blockchain applications without vulnerability focus.
+    try:
+        result, usage = _chat_completion(
+            system_message, text, model=model, temperature=temperature, api_key=api_key)
+        token_count = usage.get("total_tokens", 0)
 
-Respond with ONLY "yes" or "no"."""
-    else:
-        system_prompt = """Determine if this paper is about AI SECURITY VULNERABILITIES, ATTACKS, or DEFENSES.
+        return _is_yes(result), token_count
+    except Exception as e:
+        logger.error("❌ Error in quick relevance assessment: %s", e)
+        return _FallbackResult((False, 0))
 
-ONLY "yes" if the paper studies:
-- Attacks: jailbreaking, prompt injection, adversarial examples, model extraction, data poisoning,
-- Defenses: guardrails, safety mechanisms, attack detection, robustness techniques
-- Red teaming: testing models for vulnerabilities, safety evaluation with adversarial intent
-- Privacy attacks: membership inference, model inversion, data extraction from models
 
-"no" if:
-- General AI capabilities, benchmarks, or applications (medical, IoT, legal, etc.) WITHOUT security/attack focus
-- General AI ethics, fairness, or bias WITHOUT security vulnerability aspects
-- Federated/distributed learning, unlearning
-- AI alignment or safety WITHOUT discussing specific vulnerabilities or attacks
+def quick_assess_relevance_batch(texts: List[str], api_key: str, temperature: float = 0.1, model: str = "openai/gpt-4.1-nano", feed_type: str = "ai-security") -> List[Tuple[bool, int]]:
+    """Quick relevance screening of several papers with a single request.
 
-Respond with ONLY "yes" or "no"."""
+    Papers the keyword prefilter can decide, or that quick_assess_relevance
+    has already cached, never reach the model. The rest share one request and
+    one copy of the system prompt; any the model leaves out of its answer are
+    screened individually.
 
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": text}
-        ],
-        "temperature": temperature
-    }
+    Args:
+        texts: The paper titles and abstracts, one per paper
+        api_key: OpenRouter API key
+        temperature: Temperature for the model (default: 0.1)
+        model: Model to use (default: openai/gpt-4.1-nano)
+        feed_type: Type of feed to assess for (default: ai-security)
 
+    Returns:
+        List of (potentially relevant, tokens used) tuples in the same order as texts
+    """
+    function_name = quick_assess_relevance.__name__
+    scope = LLMCache.make_scope(function_name, model, temperature, feed_type, PROMPT_VERSION)
+    results = [None] * len(texts)
+    cache_keys = [get_cache_key(text, model, function_name, temperature, feed_type) for text in texts]
+    embeddings = {}
+    pending = []
+    for i, text in enumerate(texts):
+        results[i] = _quick_prefilter(text, feed_type)
+        if results[i] is None:
+            results[i], embeddings[i] = _lookup_cached(cache_keys[i], temperature, function_name, text, scope)
+        if results[i] is None:
+            pending.append(i)
+    if not pending:
+        return results
+
+    system_message = _QUICK_BATCH_SYSTEM_MESSAGES.get(feed_type, _QUICK_BATCH_SYSTEM_MESSAGES["ai-security"])
+    user_content = _dumps([{"id": i, "text": texts[i]} for i in pending]).decode("utf-8")
+
+    answers = {}
+    total_tokens = 0
     try:
-        response = make_rate_limited_request(
-            f"{OPENROUTER_BASE_URL}/chat/completions",
-            headers=headers,
-            payload=payload
-        )
-        result_data = response.json()
-        result = result_data["choices"][0]["message"]["content"].lower().strip()
-        token_count = result_data["usage"]["total_tokens"]
-
-        return "yes" in result, token_count
+        result, usage = _chat_completion(
+            system_message, user_content, model=model, temperature=temperature, api_key=api_key,
+            response_format={"type": "json_object"})
+        total_tokens = usage.get("total_tokens", 0)
+
+        for item in clean_and_extract_json(result).get("results", []):
+            if isinstance(item, dict) and isinstance(item.get("id"), int):
+                answer = _parse_batch_answer(item.get("answer"))
+                if answer is not None:
+                    answers[item["id"]] = answer
     except Exception as e:
-        print(f"❌ Error in quick relevance assessment: {str(e)}")
-        return False, 0
+        logger.error("❌ Error in batch quick relevance assessment: %s", e)
+
+    for i, share in zip(pending, _split_tokens(total_tokens, len(pending))):
+        answer = answers.get(i)
+        if answer is None:
+            logger.warning("⚠️ Paper %d missing or unclear in batch response; screening it on its own", i)
+            relevant, tokens = quick_assess_relevance(
+                texts[i], api_key, temperature=temperature, model=model, feed_type=feed_type)
+            results[i] = (relevant, tokens + share)
+        else:
+            results[i] = (answer, share)
+            _store_cached(cache_keys[i], temperature, results[i], scope, embeddings.get(i))
+    return results
 
 
 def calculate_cost(input_tokens: int, output_tokens: int, model: str) -> float:
@@ -646,16 +1354,9 @@ def calculate_cost(input_tokens: int, output_tokens: int, model: str) -> float:
     Returns:
         Estimated cost in USD
     """
-    if model not in OPENROUTER_PRICING:
-        # Default to GPT-4o pricing if model not found
-        pricing = OPENROUTER_PRICING.get("openai/gpt-4o", {"input": 2.50, "output": 10.00})
-    else:
-        pricing = OPENROUTER_PRICING[model]
-    
-    input_cost = (input_tokens / 1_000_000) * pricing["input"]
-    output_cost = (output_tokens / 1_000_000) * pricing["output"]
-    
-    return input_cost + output_cost
+    # Default to GPT-4o pricing if model not found
+    input_price, output_price = _COST_PER_TOKEN.get(model, _DEFAULT_COST_PER_TOKEN)
+    return input_tokens * input_price + output_tokens * output_price
 
 
 def format_cost(cost: float) -> str:
@@ -679,12 +1380,19 @@ def format_cost(cost: float) -> str:
 
 # Initialize the embedding model once as a global variable for efficiency
 _embedding_model = None
+_embedding_model_lock = threading.Lock()
 
 def get_embedding_model():
-    """Get or initialize the embedding model."""
+    """Get or initialize the embedding model.
+
+    The semantic cache calls this from the assessment worker threads, so the
+    first load is done under a lock to keep each thread from loading its own copy.
+    """
     global _embedding_model
     if _embedding_model is None:
-        _embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                _embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
     return _embedding_model
 
 def generate_embeddings(text: str) -> List[float]:
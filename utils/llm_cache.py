@@ -0,0 +1,216 @@
+# utils/llm_cache.py
+
+import os
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Location of the on-disk cache; restored between workflow runs by actions/cache
+DEFAULT_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("data", "llm_cache.sqlite"))
+MAX_CACHEABLE_TEMPERATURE = 0.2  # Above this, repeated calls are not expected to agree
+DEFAULT_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Re-assess papers after a week
+SCHEMA_VERSION = 2  # Bump to discard cache files written with an older table layout
+
+# Semantic cache: reuse the answer for a near-duplicate text (e.g. an arXiv v2 or cross-listing)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))  # Minimum cosine similarity to count as the same paper
+PREFETCH_CHUNK_SIZE = 500  # Keys per SELECT ... IN query, well under SQLite's bound-parameter limit
+
+
+class LLMCache:
+    """Persistent cache of LLM results backed by SQLite.
+
+    Entries are keyed by utils.llm.get_cache_key, a digest of the calling
+    function, model, temperature, feed type, system prompt digest and full input
+    text, so rerunning the pipeline over papers it has already seen costs a
+    disk lookup instead of an API call. Entries expire after ttl_seconds.
+    One connection is shared between threads and serialized by a lock.
+
+    A second table stores normalized text embeddings next to their results
+    for the semantic lookup; each scope's embeddings are loaded into a numpy
+    matrix the first time it is searched.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        # Start over if the file was written with an older layout
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS cache")
+            self.conn.execute("DROP TABLE IF EXISTS semantic")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (k TEXT PRIMARY KEY, v TEXT NOT NULL, expires_at INTEGER NOT NULL)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS semantic "
+            "(scope TEXT NOT NULL, emb BLOB NOT NULL, v TEXT NOT NULL, expires_at INTEGER NOT NULL)")
+
+        # Drop expired entries so the file does not grow without bound across runs
+        now = int(time.time())
+        self.conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        self.conn.execute("DELETE FROM semantic WHERE expires_at <= ?", (now,))
+        self.conn.commit()
+        self._indexes = {}
+
+    @staticmethod
+    def is_cacheable(temperature: float) -> bool:
+        """Check if calls at this temperature are deterministic enough to cache."""
+        return temperature <= MAX_CACHEABLE_TEMPERATURE
+
+    @staticmethod
+    def make_scope(function_name: str, model: str, temperature: float, feed_type: str, prompt_version: str) -> str:
+        """Build the part of the cache key shared by every text sent to the same call.
+
+        Args:
+            function_name: Name of the cached function
+            model: Model name
+            temperature: Sampling temperature
+            feed_type: Feed the paper is assessed for
+            prompt_version: Digest of the system prompts in use
+
+        Returns:
+            str: A cache scope
+        """
+        return f"{function_name}|{model}|{temperature}|{feed_type}|{prompt_version}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if it is not cached or has expired."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT v FROM cache WHERE k = ? AND expires_at > ?", (key, int(time.time()))).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Return the cached values for every key that is cached and not expired.
+
+        Keys are looked up with one SELECT ... IN query per PREFETCH_CHUNK_SIZE
+        keys instead of one query each.
+        """
+        now = int(time.time())
+        rows = []
+        with self.lock:
+            for start in range(0, len(keys), PREFETCH_CHUNK_SIZE):
+                chunk = keys[start:start + PREFETCH_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(self.conn.execute(
+                    f"SELECT k, v FROM cache WHERE k IN ({placeholders}) AND expires_at > ?",
+                    (*chunk, now)).fetchall())
+        return {key: json.loads(value) for key, value in rows}
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under key, replacing any previous entry."""
+        data = json.dumps(value, ensure_ascii=False)
+        expires_at = int(time.time()) + self.ttl_seconds
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO cache (k, v, expires_at) VALUES (?, ?, ?)",
+                              (key, data, expires_at))
+            self.conn.commit()
+
+    def close(self) -> None:
+        """Close the connection, checkpointing the write-ahead log into the main file."""
+        with self.lock:
+            self.conn.close()
+
+    def _index(self, scope: str):
+        """Return the (embedding matrix, values) index for scope, loading it on first use. Caller holds the lock."""
+        if scope not in self._indexes:
+            rows = self.conn.execute("SELECT emb, v FROM semantic WHERE scope = ? AND expires_at > ?",
+                                     (scope, int(time.time()))).fetchall()
+            matrix = np.vstack([np.frombuffer(emb, dtype=np.float32) for emb, _ in rows]) if rows else None
+            self._indexes[scope] = (matrix, [v for _, v in rows])
+        return self._indexes[scope]
+
+    def get_similar(self, scope: str, embedding: np.ndarray,
+                    threshold: float = SEMANTIC_CACHE_THRESHOLD) -> Optional[Any]:
+        """Return the value stored for the most similar text in scope, or None if nothing is close enough.
+
+        Args:
+            scope: Cache scope from make_scope
+            embedding: Normalized embedding of the new text
+            threshold: Minimum cosine similarity for a hit
+
+        Returns:
+            The cached value, or None
+        """
+        with self.lock:
+            matrix, values = self._index(scope)
+            if matrix is None:
+                return None
+            scores = matrix @ np.asarray(embedding, dtype=np.float32)
+            best = int(scores.argmax())
+            if scores[best] < threshold:
+                return None
+            data = values[best]
+        return json.loads(data)
+
+    def add_similar(self, scope: str, embedding: np.ndarray, value: Any) -> None:
+        """Store a value with the normalized embedding of its text for later get_similar lookups."""
+        data = json.dumps(value, ensure_ascii=False)
+        vector = np.asarray(embedding, dtype=np.float32)
+        expires_at = int(time.time()) + self.ttl_seconds
+        with self.lock:
+            self.conn.execute("INSERT INTO semantic (scope, emb, v, expires_at) VALUES (?, ?, ?, ?)",
+                              (scope, vector.tobytes(), data, expires_at))
+            self.conn.commit()
+            matrix, values = self._index(scope)
+            matrix = vector[None, :] if matrix is None else np.vstack([matrix, vector])
+            self._indexes[scope] = (matrix, values + [data])
+
+
+_persistent_cache = None
+_persistent_cache_lock = threading.Lock()
+
+
+def get_persistent_cache() -> Optional[LLMCache]:
+    """Get the global persistent cache, opening it on first use.
+
+    Returns None when the cache file cannot be opened, in which case callers
+    simply go to the API as before.
+    """
+    global _persistent_cache
+    if _persistent_cache is None:
+        with _persistent_cache_lock:
+            if _persistent_cache is None:
+                try:
+                    _persistent_cache = LLMCache()
+                    atexit.register(_persistent_cache.close)
+                except (sqlite3.Error, OSError) as e:
+                    logger.warning("⚠️ Persistent LLM cache disabled: %s", e)
+                    _persistent_cache = False
+    return _persistent_cache or None
+
+
+def prefetch_cache(keys: List[str]) -> Dict[str, Any]:
+    """Look up many keys in the persistent cache at once.
+
+    Args:
+        keys: Cache keys from utils.llm.get_cache_key
+
+    Returns:
+        Dict mapping each cached key to its value; empty when the cache is disabled
+    """
+    persistent_cache = get_persistent_cache()
+    if persistent_cache is None or not keys:
+        return {}
+    return persistent_cache.get_many(keys)